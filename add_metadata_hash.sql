@@ -0,0 +1,3 @@
+-- Store a hash of each release's metadata.json so supabase_sync.py can
+-- skip track upserts for releases that haven't changed
+ALTER TABLE releases ADD COLUMN IF NOT EXISTS metadata_hash text;
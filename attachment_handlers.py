@@ -3,6 +3,7 @@ Attachment Handlers - Pluggable processors for different attachment types
 """
 
 import os
+import shutil
 import zipfile
 import io
 from pathlib import Path
@@ -39,9 +40,9 @@ def process_zip_attachment(attachment, target_dir: Path, extracted_text: Dict,
             slugged_name = slugify_filename(filename)
             file_path = extract_dir / slugged_name
             
-            # Extract file
+            # Extract file in 1 MiB chunks rather than reading the whole member
             with z.open(file_info.filename) as source, open(file_path, 'wb') as target:
-                target.write(source.read())
+                shutil.copyfileobj(source, target, 1 << 20)
             
             # Track original extracted file info
             file_metadata = {
@@ -58,7 +59,7 @@ def process_zip_attachment(attachment, target_dir: Path, extracted_text: Dict,
                     continue  # Skip self
                     
                 handler = get_handler(processor_config.handler)
-                if _matches_pattern(slugged_name, processor_config.file_patterns):
+                if processor_config.matches(slugged_name):
                     # Create a mock attachment object for the extracted file
                     class ExtractedFile:
                         def __init__(self, path):
@@ -98,6 +99,7 @@ def normalize_audio_handler(attachment, target_dir: Path, extracted_text: Dict,
         - target_lufs: target loudness (default: workflow setting or -16.0)
         - bitrate: target bitrate (default: workflow setting or "320k")
         - output_format: output format (default: workflow setting or "original")
+        - fast: single-pass loudnorm instead of two-pass (default: False)
     """
     orig_name = clean_text(attachment.filename)
     slugged_name = slugify_filename(orig_name)
@@ -119,7 +121,8 @@ def normalize_audio_handler(attachment, target_dir: Path, extracted_text: Dict,
             str(file_path),
             output_format=output_format,
             target_lufs=target_lufs,
-            bitrate=bitrate
+            bitrate=bitrate,
+            fast=options.get('fast', False)
         )
         
         # Determine final filename after normalization
@@ -217,10 +220,3 @@ def get_handler(handler_name: str):
 def register_handler(name: str, handler_func):
     """Register a custom handler"""
     HANDLERS[name] = handler_func
-
-
-def _matches_pattern(filename: str, patterns: List[str]) -> bool:
-    """Check if filename matches any pattern"""
-    import fnmatch
-    filename_lower = filename.lower()
-    return any(fnmatch.fnmatch(filename_lower, pattern.lower()) for pattern in patterns)
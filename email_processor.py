@@ -4,6 +4,7 @@ Email Processor - Core email processing logic using workflow configurations
 
 import sys
 import os
+import re
 import json
 from typing import Dict, List, Optional
 from pathlib import Path
@@ -13,9 +14,13 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from workflows import WorkflowConfig
 from imap_utils import fetch_emails
+from fast_mp3_duration import get_duration
+from jsonio import atomic_write_json, read_json
 from utils import clean_text, sanitize_for_json, slugify_filename, is_already_downloaded, mark_as_downloaded
 from attachment_handlers import get_handler
 
+_IMG_RE = re.compile(r'\.(?:jpe?g|png|gif|bmp|webp|svg)$', re.IGNORECASE)
+
 
 class EmailProcessor:
     """Processes emails according to a workflow configuration"""
@@ -25,6 +30,8 @@ class EmailProcessor:
         self.base_dir = Path(workflow.base_dir)
         self.base_dir.mkdir(exist_ok=True)
         self.registry_path = self.base_dir / workflow.registry_filename
+        # Resolve handler functions once rather than per attachment
+        self.handlers = {p.handler: get_handler(p.handler) for p in workflow.attachment_processors}
     
     def _get_latest_archived_date(self) -> Optional[str]:
         """Find the most recent email date from existing raw.json files"""
@@ -39,23 +46,22 @@ class EmailProcessor:
         # Scan all subdirectories for raw.json files
         for raw_json_path in self.base_dir.rglob("raw.json"):
             try:
-                with open(raw_json_path, 'r') as f:
-                    data = json.load(f)
-                    date_str = data.get('date')
+                data = read_json(raw_json_path)
+                date_str = data.get('date')
+                
+                if date_str:
+                    # Handle both single date and list of dates
+                    if isinstance(date_str, list):
+                        date_str = date_str[0] if date_str else None
                     
                     if date_str:
-                        # Handle both single date and list of dates
-                        if isinstance(date_str, list):
-                            date_str = date_str[0] if date_str else None
+                        # Parse the date string
+                        email_date = datetime.fromisoformat(str(date_str).replace('Z', '+00:00'))
                         
-                        if date_str:
-                            # Parse the date string
-                            email_date = datetime.fromisoformat(str(date_str).replace('Z', '+00:00'))
-                            
-                            if latest_datetime is None or email_date > latest_datetime:
-                                latest_datetime = email_date
-                                # Format as YYYY/MM/DD for Gmail search (4-digit year required)
-                                latest_date = email_date.strftime("%Y/%m/%d")
+                        if latest_datetime is None or email_date > latest_datetime:
+                            latest_datetime = email_date
+                            # Format as YYYY/MM/DD for Gmail search (4-digit year required)
+                            latest_date = email_date.strftime("%Y/%m/%d")
             
             except Exception as e:
                 print(f"⚠️  Could not read date from {raw_json_path}: {e}")
@@ -74,17 +80,18 @@ class EmailProcessor:
         prefix = self.workflow.release_indicator + "_"
         max_num = 0
 
-        # Scan for existing release folders
-        for item in self.base_dir.iterdir():
-            if item.is_dir() and item.name.startswith(prefix):
-                # Extract the number part
-                num_str = item.name[len(prefix):]
-                try:
-                    num = int(num_str)
-                    max_num = max(max_num, num)
-                except ValueError:
-                    # Skip folders that don't have numeric suffix
-                    pass
+        # Scan for existing release folders (DirEntry.is_dir avoids a stat per entry)
+        with os.scandir(self.base_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.is_dir():
+                    # Extract the number part
+                    num_str = entry.name[len(prefix):]
+                    try:
+                        num = int(num_str)
+                        max_num = max(max_num, num)
+                    except ValueError:
+                        # Skip folders that don't have numeric suffix
+                        pass
 
         return str(max_num + 1)
 
@@ -219,24 +226,23 @@ class EmailProcessor:
         
         
         # Find matching processor
-        for processor_config in self.workflow.attachment_processors:
-            if self._matches_pattern(orig_name, processor_config.file_patterns):
-                handler = get_handler(processor_config.handler)
-                return handler(
-                    attachment=att,
-                    target_dir=target_dir,
-                    extracted_text=extracted_text,
-                    options=processor_config.options,
-                    workflow=self.workflow
-                )
+        processor_config = self.workflow.match_processor(orig_name)
+        if processor_config:
+            handler = self.handlers[processor_config.handler]
+            return handler(
+                attachment=att,
+                target_dir=target_dir,
+                extracted_text=extracted_text,
+                options=processor_config.options,
+                workflow=self.workflow
+            )
         
         # No processor matched - save as-is to appropriate directory
         return self._save_raw_attachment(att, target_dir)
     
     def _is_image(self, filename: str) -> bool:
         """Check if filename is an image"""
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg']
-        return any(filename.lower().endswith(ext) for ext in image_extensions)
+        return _IMG_RE.search(filename) is not None
     
     def _save_raw_attachment(self, att, target_dir: Path) -> List[Dict]:
         """Save attachment without processing"""
@@ -249,12 +255,6 @@ class EmailProcessor:
         
         return [{"original": orig_name, "slugified": slugged_name}]
     
-    def _matches_pattern(self, filename: str, patterns: List[str]) -> bool:
-        """Check if filename matches any of the given patterns"""
-        import fnmatch
-        filename_lower = filename.lower()
-        return any(fnmatch.fnmatch(filename_lower, pattern.lower()) for pattern in patterns)
-    
     def _save_metadata(self, issue_dir: Path, msg, clean_subject: str,
                       attachment_metadata: List[Dict], extracted_text: Dict,
                       title: Optional[str] = None):
@@ -290,13 +290,12 @@ class EmailProcessor:
             new_data["subject"] = [new_data["subject"]]
             final_data = new_data
         
-        with open(raw_json_path, "w") as f:
-            json.dump(final_data, f, indent=4)
+        # pretty_raw_json forces indentation; otherwise PRETTY_JSON decides
+        atomic_write_json(raw_json_path, final_data, indent=self.workflow.pretty_raw_json or None)
     
     def _merge_metadata(self, raw_json_path: Path, new_data: Dict) -> Dict:
         """Merge new metadata with existing"""
-        with open(raw_json_path, "r") as f:
-            existing = json.load(f)
+        existing = read_json(raw_json_path)
         
         # Convert single values to lists
         for list_key in ["uid", "message_id", "subject"]:
@@ -352,16 +351,18 @@ class EmailProcessor:
     def _add_track_durations(self, issue_dir: Path):
         """Add duration field to tracks in metadata.json by reading actual audio files"""
         try:
-            from mutagen.mp3 import MP3
-            
             metadata_path = issue_dir / "metadata.json"
             if not metadata_path.exists():
                 return
             
             print(f"🎵 Adding track durations...")
             
-            with open(metadata_path, 'r') as f:
-                data = json.load(f)
+            data = read_json(metadata_path)
+            
+            # Durations cached by (name, mtime, size) so unchanged files aren't re-parsed
+            cache_path = issue_dir / ".durations.json"
+            cache = read_json(cache_path) if cache_path.exists() else {}
+            seen = {}
             
             updated = False
             for track in data.get('tracks', []):
@@ -376,8 +377,12 @@ class EmailProcessor:
                 
                 if audio_path.exists():
                     try:
-                        audio = MP3(str(audio_path))
-                        duration = int(audio.info.length)
+                        stat = audio_path.stat()
+                        cache_key = f"{audio_path.name}:{stat.st_mtime_ns}:{stat.st_size}"
+                        duration = cache.get(cache_key)
+                        if duration is None:
+                            duration = int(get_duration(audio_path))
+                        seen[cache_key] = duration
                         track['duration'] = duration
                         print(f"  ✓ {track.get('title', audio_filename)}: {duration}s")
                         updated = True
@@ -387,13 +392,13 @@ class EmailProcessor:
                     print(f"  ⚠️  Audio file not found: {audio_filename}")
             
             if updated:
-                with open(metadata_path, 'w') as f:
-                    json.dump(data, f, indent=4)
+                atomic_write_json(metadata_path, data)
                 print(f"✅ Track durations added")
             
-        except ImportError:
-            print(f"⚠️  mutagen not installed - skipping duration calculation")
-            print(f"   Install with: pip install mutagen")
+            # Only keep entries for files seen this run so stale keys don't pile up
+            if seen != cache:
+                atomic_write_json(cache_path, seen)
+            
         except Exception as e:
             print(f"⚠️  Error adding durations: {e}")
     
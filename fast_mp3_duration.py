@@ -0,0 +1,163 @@
+"""
+Fast MP3 duration - reads the first MPEG frame header instead of a full tag parse
+
+Handles Xing/Info and VBRI headers (VBR) and falls back to file size / bitrate
+(CBR). Anything it can't parse is handed to mutagen.
+"""
+
+import os
+from pathlib import Path
+
+# Bitrates in kbps by (MPEG version class, layer), indexed by the 4-bit header field
+_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Sample rates by the 2-bit version field (3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5)
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+# Bytes to read after the ID3v2 tag - enough for padding plus the first frame
+_PROBE_SIZE = 4096
+
+
+def _id3v2_size(header: bytes) -> int:
+    """Total size of an ID3v2 tag given its 10-byte header, 0 if there isn't one"""
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+    size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+    if header[5] & 0x10:  # footer present
+        size += 10
+    return size + 10
+
+
+def _parse_frame_header(buf: bytes, pos: int):
+    """Decode a 4-byte MPEG frame header, returning None if it isn't valid"""
+    b1, b2, b3 = buf[pos + 1], buf[pos + 2], buf[pos + 3]
+    version_bits = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_idx = (b2 >> 4) & 0x0F
+    rate_idx = (b2 >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+
+    layer = 4 - layer_bits
+    mpeg1 = version_bits == 3
+    bitrate = _BITRATES[(1 if mpeg1 else 2, layer)][bitrate_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][rate_idx]
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 2 or mpeg1:
+        samples_per_frame = 1152
+    else:
+        samples_per_frame = 576
+    mono = ((b3 >> 6) & 0x03) == 3
+    padding = (b2 >> 1) & 0x01
+    if layer == 1:
+        frame_len = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        frame_len = samples_per_frame // 8 * bitrate // sample_rate + padding
+
+    return {
+        'layer': layer,
+        'mpeg1': mpeg1,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'samples_per_frame': samples_per_frame,
+        'mono': mono,
+        'frame_len': frame_len,
+    }
+
+
+def _vbr_frame_count(buf: bytes, pos: int, header: dict):
+    """Frame count from a Xing/Info or VBRI header in the first frame, if present"""
+    if header['layer'] == 3:
+        if header['mpeg1']:
+            side_info = 17 if header['mono'] else 32
+        else:
+            side_info = 9 if header['mono'] else 17
+        xing = pos + 4 + side_info
+        if buf[xing:xing + 4] in (b'Xing', b'Info'):
+            flags = int.from_bytes(buf[xing + 4:xing + 8], 'big')
+            if flags & 0x01:
+                return int.from_bytes(buf[xing + 8:xing + 12], 'big')
+            return None
+
+    vbri = pos + 36
+    if buf[vbri:vbri + 4] == b'VBRI':
+        return int.from_bytes(buf[vbri + 14:vbri + 18], 'big')
+    return None
+
+
+def _next_frame_matches(f, offset: int, header: dict) -> bool:
+    """True if a frame with the same version/layer/sample rate starts at offset"""
+    f.seek(offset)
+    nxt = f.read(4)
+    if len(nxt) < 4 or nxt[0] != 0xFF or nxt[1] & 0xE0 != 0xE0:
+        return False
+    other = _parse_frame_header(nxt, 0)
+    return (other is not None
+            and other['layer'] == header['layer']
+            and other['mpeg1'] == header['mpeg1']
+            and other['sample_rate'] == header['sample_rate'])
+
+
+def _fast_duration(path: str):
+    """Duration in seconds from the MPEG headers, or None if they can't be parsed"""
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        audio_start = _id3v2_size(f.read(10))
+        f.seek(audio_start)
+        buf = f.read(_PROBE_SIZE)
+
+        # Skip padding to the first frame sync. A lone header-like byte pair is
+        # easy to hit in non-MPEG data, so a second frame must follow it.
+        pos = buf.find(b'\xff')
+        while pos != -1 and pos + 64 <= len(buf):
+            if buf[pos + 1] & 0xE0 == 0xE0:
+                header = _parse_frame_header(buf, pos)
+                if header and _next_frame_matches(f, audio_start + pos + header['frame_len'], header):
+                    break
+            pos = buf.find(b'\xff', pos + 1)
+        else:
+            return None
+
+        frames = _vbr_frame_count(buf, pos, header)
+        if frames:
+            return frames * header['samples_per_frame'] / header['sample_rate']
+
+        # CBR: audio bytes / byte rate, excluding a trailing ID3v1 tag
+        audio_bytes = file_size - audio_start - pos
+        if file_size >= 128:
+            f.seek(-128, os.SEEK_END)
+            if f.read(3) == b'TAG':
+                audio_bytes -= 128
+        return audio_bytes * 8 / header['bitrate']
+
+
+def get_duration(path) -> float:
+    """
+    Get the duration of an MP3 file in seconds.
+    Falls back to mutagen when the headers can't be parsed directly.
+    """
+    path = str(path) if isinstance(path, Path) else path
+    duration = None
+    # Only MPEG audio has these headers - anything else goes straight to mutagen
+    if path.lower().endswith('.mp3'):
+        try:
+            duration = _fast_duration(path)
+        except (OSError, IndexError):
+            duration = None
+    if duration is not None:
+        return duration
+
+    from mutagen.mp3 import MP3
+    return MP3(path).info.length
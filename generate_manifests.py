@@ -12,6 +12,7 @@ from typing import Dict, List
 
 sys.path.insert(0, str(Path(__file__).parent.resolve()))
 from workflows import WORKFLOWS
+from jsonio import read_json
 
 # Base path for archives - defaults to script directory
 BASE_PATH = Path(__file__).parent.resolve()
@@ -75,15 +76,12 @@ def generate_collection_manifest(collection: Dict, base_path: Path = BASE_PATH)
             print(f"  ⚠️  No metadata: {release_folder.name}")
             continue
         
-        with open(metadata_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        metadata = read_json(metadata_file)
         
         # Load raw.json to get release date
         release_date = None
         if raw_file.exists():
-            with open(raw_file, 'r', encoding='utf-8') as f:
-                raw_data = json.load(f)
-                release_date = raw_data.get('date')
+            release_date = read_json(raw_file).get('date')
         
         release_num = metadata.get('issue_number') or metadata.get('release_number')
         release_image = metadata.get('issue_image') or metadata.get('release_image')
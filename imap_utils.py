@@ -18,10 +18,16 @@ def create_query(arguments):
     if arguments.get('uid'):
         return f"UID {arguments['uid']}"
     
-    # 2. Priority: Specific Message-ID
+    # 2. Priority: Specific Message-ID(s)
     if arguments.get('message_id'):
         # Gmail uses rfc822msgid to search the Message-ID header
         parts.append(f'rfc822msgid:\\"{arguments["message_id"]}\\"')
+    elif 'message_ids' in arguments:
+        # Batch lookup: one search matching any of the given Message-IDs.
+        # An empty list must never fall through to the workflow's broad search.
+        if not arguments['message_ids']:
+            raise ValueError("message_ids is empty - refusing to build an unfiltered search")
+        parts.append(" OR ".join(f'rfc822msgid:\\"{mid}\\"' for mid in arguments['message_ids']))
     else:
         if arguments.get('sender'):
             parts.append(f"from:{arguments['sender']}")
@@ -0,0 +1,66 @@
+"""
+JSON I/O helpers - uses orjson when installed, stdlib json otherwise
+
+Output is compact by default; set PRETTY_JSON=1 to write indented files
+for human inspection.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+# Optional import - only use orjson if available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+PRETTY_JSON = os.getenv("PRETTY_JSON") == "1"
+
+
+def loads(data) -> Any:
+    """Parse JSON from bytes or str"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent: Optional[bool] = None, sort_keys: bool = False) -> bytes:
+    """
+    Serialize obj to UTF-8 JSON bytes.
+    indent=True uses a 2-space indent; None defers to PRETTY_JSON.
+    """
+    if indent is None:
+        indent = PRETTY_JSON
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+    if indent:
+        text = json.dumps(obj, indent=2, ensure_ascii=False, sort_keys=sort_keys)
+    else:
+        text = json.dumps(obj, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys)
+    return text.encode('utf-8')
+
+
+def read_json(path) -> Any:
+    """Load a JSON file"""
+    return loads(Path(path).read_bytes())
+
+
+def write_json(path, obj, indent: Optional[bool] = None):
+    """Write obj to a JSON file"""
+    Path(path).write_bytes(dumps(obj, indent=indent))
+
+
+def atomic_write_json(path, obj, indent: Optional[bool] = None):
+    """Write obj to a JSON file via a temp file + rename, so readers never see a partial file"""
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    tmp_path.write_bytes(dumps(obj, indent=indent))
+    os.replace(tmp_path, path)
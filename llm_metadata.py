@@ -13,6 +13,8 @@ import time
 from typing import Dict, Optional, List
 from pathlib import Path
 
+from jsonio import read_json, write_json
+
 # Optional imports - only import if available
 try:
     import google.generativeai as genai
@@ -225,8 +227,7 @@ def generate_metadata_for_release(release_dir: Path, provider: str = "gemini",
         return False
     
     # Load raw data
-    with open(raw_json_path, 'r') as f:
-        raw_data = json.load(f)
+    raw_data = read_json(raw_json_path)
     
     # Use default schema if none provided
     if schema is None:
@@ -253,8 +254,7 @@ def generate_metadata_for_release(release_dir: Path, provider: str = "gemini",
         metadata = generator.generate_metadata(raw_data, schema)
         
         # Save metadata
-        with open(metadata_json_path, 'w') as f:
-            json.dump(metadata, f, indent=4)
+        write_json(metadata_json_path, metadata)
         
         print(f"✅ Metadata saved to {metadata_json_path}")
         return True
@@ -4,33 +4,30 @@ Migrate existing JSON archives to Supabase.
 Reads collections.json, tracks.json, and manifests, then uploads to Supabase.
 """
 
-import json
 import os
+from hashlib import blake2b
 from pathlib import Path
-from supabase import create_client, Client
 from typing import Dict, List
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Supabase credentials
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY in environment")
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from jsonio import dumps, read_json, write_json
 
 # Paths
 BASE_PATH = Path(__file__).parent
 ARCHIVES_PATH = BASE_PATH / "archives"
 
+# Content hashes of tracks already uploaded; delete to force a full re-upload
+HASHES_FILE = BASE_PATH / ".migrate_hashes.json"
+TRACK_BATCH_SIZE = 500
+# Rows per page when reading releases back (Supabase's default max_rows is 1000)
+RELEASE_PAGE_SIZE = 1000
+
 
 def generate_track_id(audio_file: str, collection_id: str) -> str:
-    """Generate a unique track ID from audio filename."""
+    """
+    Generate a unique track ID from audio filename.
+    Must stay in step with generate_track_registry / supabase_sync - the IDs
+    are matched against tracks.json keys and rows written by sync.
+    """
     base = audio_file.replace('.mp3', '')
     parts = base.split('_')
     if parts[0].isdigit():
@@ -39,7 +36,7 @@ def generate_track_id(audio_file: str, collection_id: str) -> str:
     return f"{collection_id}_{track_name}"
 
 
-def migrate_collections():
+def migrate_collections(supabase):
     """Migrate collections.json to Supabase."""
     print("\n📁 Migrating Collections...")
     
@@ -48,8 +45,7 @@ def migrate_collections():
         print("  ⚠️  collections.json not found")
         return
     
-    with open(collections_file, 'r') as f:
-        data = json.load(f)
+    data = read_json(collections_file)
     
     collections = data.get('collections', [])
     
@@ -71,7 +67,28 @@ def migrate_collections():
     print(f"  ✅ Migrated {len(collections)} collections")
 
 
-def migrate_releases_and_tracks():
+def fetch_release_ids(supabase) -> Dict:
+    """
+    Map (collection_id, release_number) to release ID for all releases.
+    Paged with .range() - PostgREST caps unpaginated selects at max_rows.
+    """
+    release_ids = {}
+    start = 0
+    while True:
+        page = supabase.table('releases') \
+            .select('id,collection_id,release_number') \
+            .order('id') \
+            .range(start, start + RELEASE_PAGE_SIZE - 1) \
+            .execute().data
+        if not page:
+            return release_ids
+        for r in page:
+            release_ids[(r['collection_id'], r['release_number'])] = r['id']
+        # Advance by what came back, in case the server caps pages below our size
+        start += len(page)
+
+
+def migrate_releases_and_tracks(supabase):
     """Migrate releases from manifests and tracks from tracks.json."""
     print("\n📀 Migrating Releases and Tracks...")
     
@@ -81,8 +98,7 @@ def migrate_releases_and_tracks():
         print("  ⚠️  tracks.json not found")
         return
     
-    with open(tracks_file, 'r') as f:
-        tracks_data = json.load(f)
+    tracks_data = read_json(tracks_file)
     
     all_tracks = tracks_data.get('tracks', {})
     
@@ -90,10 +106,12 @@ def migrate_releases_and_tracks():
     collections_result = supabase.table('collections').select('id').execute()
     collections = [c['id'] for c in collections_result.data if not c.get('is_virtual')]
     
-    release_id_map = {}
+    # Hydrate IDs of releases that already exist with a single SELECT
+    release_id_map = fetch_release_ids(supabase)
     track_order_map = {}
+    db_releases = []
     
-    # First pass: insert releases and build track order map from metadata files
+    # First pass: collect releases and build track order map from metadata files
     for collection_id in collections:
         print(f"\n  📁 Processing {collection_id}...")
         
@@ -102,14 +120,13 @@ def migrate_releases_and_tracks():
             print(f"    ⚠️  No manifest found")
             continue
         
-        with open(manifest_file, 'r') as f:
-            manifest = json.load(f)
+        manifest = read_json(manifest_file)
         
         releases = manifest.get('releases', [])
         release_type = manifest.get('release_type', 'Issue')
         
         for release in releases:
-            db_release = {
+            db_releases.append({
                 'collection_id': collection_id,
                 'release_number': release['release_number'],
                 'release_type': release['release_type'],
@@ -117,37 +134,39 @@ def migrate_releases_and_tracks():
                 'release_image': release.get('release_image'),
                 'track_count': release['track_count'],
                 'total_duration': release['total_duration']
-            }
-            
-            result = supabase.table('releases').upsert(
-                db_release,
-                on_conflict='collection_id,release_number'
-            ).execute()
-            
-            if result.data:
-                release_id = result.data[0]['id']
-                key = (collection_id, release['release_number'])
-                release_id_map[key] = release_id
+            })
             
             # Read metadata to get track ordering
             folder_name = f"{release_type}_{release['release_number']}"
             metadata_file = ARCHIVES_PATH / collection_id / folder_name / "metadata.json"
             
             if metadata_file.exists():
-                with open(metadata_file, 'r') as f:
-                    metadata = json.load(f)
-                    for track in metadata.get('tracks', []):
-                        audio_file = track.get('audio_file')
-                        track_num = track.get('track_num')
-                        if audio_file and track_num:
-                            track_id = generate_track_id(audio_file, collection_id)
-                            track_order_map[track_id] = track_num
+                metadata = read_json(metadata_file)
+                for track in metadata.get('tracks', []):
+                    audio_file = track.get('audio_file')
+                    track_num = track.get('track_num')
+                    if audio_file and track_num:
+                        track_id = generate_track_id(audio_file, collection_id)
+                        track_order_map[track_id] = track_num
         
-        print(f"    ✓ Inserted {len(releases)} releases")
+        print(f"    ✓ Collected {len(releases)} releases")
+    
+    # Upsert all releases in one batch
+    if db_releases:
+        supabase.table('releases').upsert(
+            db_releases,
+            on_conflict='collection_id,release_number'
+        ).execute()
+        print(f"\n  ✓ Upserted {len(db_releases)} releases")
+    
+    # Newly inserted releases need their IDs - re-SELECT once
+    if any((r['collection_id'], r['release_number']) not in release_id_map for r in db_releases):
+        release_id_map = fetch_release_ids(supabase)
     
-    # Second pass: insert tracks with proper ordering
+    # Second pass: insert tracks with proper ordering, skipping unchanged rows
     print(f"\n  🎵 Inserting {len(all_tracks)} tracks...")
-    track_count = 0
+    hashes = read_json(HASHES_FILE) if HASHES_FILE.exists() else {}
+    changed_tracks = []
     
     for track_id, track in all_tracks.items():
         first_appearance = track['first_appearance']
@@ -174,16 +193,24 @@ def migrate_releases_and_tracks():
             'track_order': track_order
         }
         
-        supabase.table('tracks').upsert(db_track).execute()
-        track_count += 1
-        
-        if track_count % 10 == 0:
-            print(f"    ... {track_count} tracks")
+        track_hash = blake2b(dumps(db_track, indent=False, sort_keys=True), digest_size=8).hexdigest()
+        if hashes.get(track_id) == track_hash:
+            continue
+        hashes[track_id] = track_hash
+        changed_tracks.append(db_track)
+    
+    print(f"    {len(all_tracks) - len(changed_tracks)} unchanged tracks skipped")
+    
+    for start in range(0, len(changed_tracks), TRACK_BATCH_SIZE):
+        supabase.table('tracks').upsert(changed_tracks[start:start + TRACK_BATCH_SIZE]).execute()
+        print(f"    ... {min(start + TRACK_BATCH_SIZE, len(changed_tracks))} tracks")
+    
+    write_json(HASHES_FILE, hashes)
     
-    print(f"  ✅ Migrated {track_count} tracks")
+    print(f"  ✅ Migrated {len(changed_tracks)} tracks")
 
 
-def verify_migration():
+def verify_migration(supabase):
     """Verify the migration by counting records."""
     print("\n🔍 Verifying Migration...")
     
@@ -201,14 +228,31 @@ def verify_migration():
 
 def main():
     """Run the full migration."""
+    # Imported here so the module's helpers work without supabase installed
+    from supabase import create_client
+    from dotenv import load_dotenv
+    
+    # Load environment variables
+    load_dotenv()
+    
+    # Supabase credentials
+    SUPABASE_URL = os.getenv("SUPABASE_URL")
+    SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+    
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY in environment")
+    
+    # Initialize Supabase client
+    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    
     print("🚀 Starting Supabase Migration...")
     print(f"📍 Base path: {BASE_PATH}")
     print(f"🔗 Supabase URL: {SUPABASE_URL}")
     
     try:
-        migrate_collections()
-        migrate_releases_and_tracks()
-        verify_migration()
+        migrate_collections(supabase)
+        migrate_releases_and_tracks(supabase)
+        verify_migration(supabase)
     except Exception as e:
         print(f"\n❌ Migration failed: {e}")
         raise
@@ -10,10 +10,12 @@ Usage:
   python normalize_manifest_paths.py sonic_twist        # Process specific collection
 """
 
-import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from jsonio import atomic_write_json, read_json
+
 
 def normalize_image_path(release_image: str | None, collection_id: str, release_number: int, release_type: str) -> str | None:
     """
@@ -31,31 +33,30 @@ def normalize_image_path(release_image: str | None, collection_id: str, release_
     if not release_image:
         return None
     
-    # Extract just the filename from the path
-    filename = Path(release_image).name
-    
+    # Extract just the filename from the path (string ops, no Path object)
+    filename = release_image.replace('\\', '/').rsplit('/', 1)[-1]
+
     # Build the standardized path
     # Format: archives/{collection_id}/{ReleaseType}_{number}/images/{filename}
-    normalized = f"archives/{collection_id}/{release_type}_{release_number}/images/{filename}"
-    
-    return normalized
+    return f"archives/{collection_id}/{release_type}_{release_number}/images/{filename}"
 
 
 def process_manifest(manifest_path: Path) -> dict:
     """
     Process a manifest file and normalize all image paths.
     
-    Returns dict with counts of changes made.
+    Returns dict with counts of changes made, plus the per-release
+    change lines under 'log' (printed by the caller to keep output ordered).
     """
-    with open(manifest_path, 'r') as f:
-        manifest = json.load(f)
+    manifest = read_json(manifest_path)
     
     collection_id = manifest['collection_id']
     changes = {
         'total': 0,
         'normalized': 0,
         'unchanged': 0,
-        'null': 0
+        'null': 0,
+        'log': []
     }
     
     for release in manifest['releases']:
@@ -76,13 +77,16 @@ def process_manifest(manifest_path: Path) -> dict:
         if normalized != original:
             release['release_image'] = normalized
             changes['normalized'] += 1
-            print(f"  Issue {release['release_number']}: {original} -> {normalized}")
+            changes['log'].append(f"  Issue {release['release_number']}: {original} -> {normalized}")
         else:
             changes['unchanged'] += 1
     
-    # Write back the normalized manifest
-    with open(manifest_path, 'w') as f:
-        json.dump(manifest, f, indent=2)
+    # Nothing to write back on idempotent re-runs
+    if changes['normalized'] == 0:
+        return changes
+    
+    # Write back the normalized manifest atomically
+    atomic_write_json(manifest_path, manifest)
     
     return changes
 
@@ -99,17 +103,25 @@ def main():
     else:
         manifest_files = list(archives_dir.glob('*/manifest.json'))
     
-    total_changes = 0
-    
+    existing_files = []
     for manifest_path in manifest_files:
-        if not manifest_path.exists():
+        if manifest_path.exists():
+            existing_files.append(manifest_path)
+        else:
             print(f"Warning: {manifest_path} does not exist")
-            continue
-        
+    
+    # Each manifest is an independent read-modify-write - process concurrently
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        results = list(ex.map(process_manifest, existing_files))
+    
+    total_changes = 0
+    
+    for manifest_path, changes in zip(existing_files, results):
         collection_name = manifest_path.parent.name
         print(f"\nProcessing {collection_name}...")
+        for line in changes['log']:
+            print(line)
         
-        changes = process_manifest(manifest_path)
         total_changes += changes['normalized']
         
         print(f"  Total releases: {changes['total']}")
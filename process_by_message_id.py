@@ -4,16 +4,23 @@ Process a single email by Message-ID for any workflow.
 Handles both regular workflows and single-release workflows (like Mixed Nuts).
 """
 
+import os
 import sys
-import json
+import shutil
+from functools import lru_cache
 from pathlib import Path
+from typing import List
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 from workflows import get_workflow
 from email_processor import EmailProcessor
 from imap_utils import fetch_emails
-from utils import clean_text, sanitize_for_json
+from jsonio import atomic_write_json, read_json, write_json
+from utils import clean_text, sanitize_for_json, move_file
+
+# Workflow configs are static - cache lookups across calls
+get_workflow = lru_cache(maxsize=8)(get_workflow)
 
 
 def process_by_message_id(workflow_name: str, message_id: str):
@@ -22,6 +29,7 @@ def process_by_message_id(workflow_name: str, message_id: str):
     Handles single-release mode automatically.
     """
     workflow = get_workflow(workflow_name)
+    processor = EmailProcessor(workflow)
     
     print(f"🔍 Looking for email with Message-ID: {message_id}")
     
@@ -33,38 +41,84 @@ def process_by_message_id(workflow_name: str, message_id: str):
     for msg in fetch_emails(imap_args):
         found = True
         print(f"\n✅ Found email: {msg.subject}")
-        
-        try:
-            if workflow.single_release_mode:
-                # SINGLE RELEASE MODE (e.g., Mixed Nuts)
-                process_single_release_email(msg, workflow)
-            else:
-                # REGULAR MODE
-                processor = EmailProcessor(workflow)
-                processor.process_single_email(msg, force=True)
-                processor._mark_processed(msg.uid)
-            
-            print(f"\n✅ Successfully processed!")
-            return True
-            
-        except Exception as e:
-            print(f"\n❌ Error processing: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
+        return _process_message(msg, workflow, processor)
     
     if not found:
         print(f"\n❌ No email found with Message-ID: {message_id}")
         return False
 
 
-def process_single_release_email(msg, workflow):
+def process_by_message_ids(workflow_name: str, message_ids: List[str]):
+    """
+    Process several emails by Message-ID in one IMAP session.
+    All IDs are matched by a single search instead of one search per ID.
+    """
+    if not message_ids:
+        print("❌ No Message-IDs given")
+        return False
+    
+    workflow = get_workflow(workflow_name)
+    processor = EmailProcessor(workflow)
+    
+    print(f"🔍 Looking for {len(message_ids)} emails by Message-ID")
+    
+    imap_args = workflow.to_imap_args()
+    imap_args['message_ids'] = message_ids
+    
+    # fetch_emails yields newest first - process in the order the IDs were given,
+    # so single-release track numbers follow the list (unlisted matches go last, oldest first)
+    order = {_normalize_message_id(mid): i for i, mid in enumerate(message_ids)}
+    messages = sorted(
+        fetch_emails(imap_args),
+        key=lambda msg: (order.get(_normalize_message_id(msg.obj.get('Message-ID', '')), len(order)), msg.date),
+    )
+    
+    found = 0
+    failed = 0
+    for msg in messages:
+        found += 1
+        print(f"\n✅ Found email [{found}/{len(message_ids)}]: {msg.subject}")
+        if not _process_message(msg, workflow, processor):
+            failed += 1
+    
+    if found < len(message_ids):
+        print(f"\n⚠️  {len(message_ids) - found} Message-IDs not found")
+    
+    print(f"\n✅ Processed {found - failed} of {len(message_ids)} emails")
+    return found > 0 and failed == 0
+
+
+def _normalize_message_id(message_id) -> str:
+    """Compare Message-IDs with or without their angle brackets"""
+    return str(message_id).strip().strip('<>')
+
+
+def _process_message(msg, workflow, processor) -> bool:
+    """Dispatch a fetched email to single-release or regular processing"""
+    try:
+        if workflow.single_release_mode:
+            # SINGLE RELEASE MODE (e.g., Mixed Nuts)
+            process_single_release_email(msg, workflow, processor)
+        else:
+            # REGULAR MODE
+            processor.process_single_email(msg, force=True)
+            processor._mark_processed(msg.uid)
+        
+        print(f"\n✅ Successfully processed!")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ Error processing: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def process_single_release_email(msg, workflow, processor=None):
     """
     Process an email for a single-release workflow.
     Generates LLM metadata for the new track(s), then appends to existing release.
     """
-    from llm_metadata import generate_metadata_for_release
-    
     base_dir = Path(workflow.base_dir)
     release_dir = base_dir / workflow.single_release_name
     audio_dir = release_dir / "audio"
@@ -79,7 +133,7 @@ def process_single_release_email(msg, workflow):
     temp_images_dir.mkdir(parents=True, exist_ok=True)
     
     # Process attachments into temp directory
-    processor = EmailProcessor(workflow)
+    processor = processor or EmailProcessor(workflow)
     attachment_metadata = []
     extracted_text = {}
     
@@ -102,12 +156,14 @@ def process_single_release_email(msg, workflow):
     }
     
     temp_raw_file = temp_dir / "raw.json"
-    with open(temp_raw_file, 'w') as f:
-        json.dump(raw_data, f, indent=4)
+    write_json(temp_raw_file, raw_data)
     
     # Generate LLM metadata for this email
     print(f"🧠 Generating track metadata with {workflow.metadata_llm_provider.upper()}...")
     
+    # Deferred: pulls in the LLM SDKs, which only this path needs
+    from llm_metadata import generate_metadata_for_release
+    
     success = generate_metadata_for_release(
         release_dir=temp_dir,
         provider=workflow.metadata_llm_provider,
@@ -116,7 +172,6 @@ def process_single_release_email(msg, workflow):
     
     if not success:
         print(f"⚠️  Metadata generation failed")
-        import shutil
         shutil.rmtree(temp_dir)
         return
     
@@ -125,13 +180,11 @@ def process_single_release_email(msg, workflow):
     
     # Load the newly generated metadata
     temp_metadata_file = temp_dir / "metadata.json"
-    with open(temp_metadata_file, 'r') as f:
-        new_metadata = json.load(f)
+    new_metadata = read_json(temp_metadata_file)
     
     # Load or create main metadata
     if main_metadata_file.exists():
-        with open(main_metadata_file, 'r') as f:
-            main_metadata = json.load(f)
+        main_metadata = read_json(main_metadata_file)
         print(f"📝 Appending to existing release with {len(main_metadata.get('tracks', []))} tracks")
     else:
         main_metadata = {
@@ -144,21 +197,24 @@ def process_single_release_email(msg, workflow):
     audio_dir.mkdir(parents=True, exist_ok=True)
     images_dir.mkdir(parents=True, exist_ok=True)
     
-    import shutil
-    for file in temp_audio_dir.iterdir():
-        shutil.move(str(file), str(audio_dir / file.name))
-    for file in temp_images_dir.iterdir():
-        shutil.move(str(file), str(images_dir / file.name))
+    audio_dir_str = str(audio_dir)
+    images_dir_str = str(images_dir)
+    with os.scandir(temp_audio_dir) as entries:
+        for entry in entries:
+            move_file(entry.path, os.path.join(audio_dir_str, entry.name))
+    with os.scandir(temp_images_dir) as entries:
+        for entry in entries:
+            move_file(entry.path, os.path.join(images_dir_str, entry.name))
     
     # Append new tracks with updated track numbers
-    for track in new_metadata.get('tracks', []):
-        track['track_num'] = len(main_metadata['tracks']) + 1
+    base = len(main_metadata['tracks'])
+    for track_num, track in enumerate(new_metadata.get('tracks', []), start=base + 1):
+        track['track_num'] = track_num
         main_metadata['tracks'].append(track)
         print(f"  ✓ Added track #{track['track_num']}: {track.get('title', 'Unknown')}")
     
     # Save updated main metadata
-    with open(main_metadata_file, 'w') as f:
-        json.dump(main_metadata, f, indent=4)
+    atomic_write_json(main_metadata_file, main_metadata)
     
     # Clean up temp directory
     shutil.rmtree(temp_dir)
@@ -173,11 +229,22 @@ if __name__ == "__main__":
         description="Process a specific email by Message-ID"
     )
     parser.add_argument('workflow', help='Workflow name (e.g., mixed_nuts, sonic_twist)')
-    parser.add_argument('message_id', help='Message-ID from email header')
+    parser.add_argument('message_id', nargs='?', help='Message-ID from email header')
+    parser.add_argument('--ids-file', help='File with one Message-ID per line (fetched in one batch)')
     
     args = parser.parse_args()
     
-    success = process_by_message_id(args.workflow, args.message_id)
+    if args.ids_file and args.message_id:
+        parser.error("Specify either a Message-ID or --ids-file, not both")
+    
+    if args.ids_file:
+        with open(args.ids_file, 'r') as f:
+            message_ids = [line.strip() for line in f if line.strip()]
+        success = process_by_message_ids(args.workflow, message_ids)
+    elif args.message_id:
+        success = process_by_message_id(args.workflow, args.message_id)
+    else:
+        parser.error("Specify either a Message-ID or --ids-file")
     
     if success:
         workflow = get_workflow(args.workflow)
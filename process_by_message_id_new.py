@@ -6,6 +6,7 @@ def process_single_release_email(msg, workflow):
     images_dir = release_dir / "images"
     metadata_file = release_dir / "metadata.json"
     temp_metadata_file = release_dir / "new_track_metadata.json"
+    generated_file = temp_metadata_file.with_name(temp_metadata_file.stem + "_generated.json")
     raw_file = release_dir / "raw.json"
     
     # Create directories
@@ -33,8 +34,7 @@ def process_single_release_email(msg, workflow):
         **extracted_text
     }
     
-    with open(temp_metadata_file, 'w') as f:
-        json.dump(raw_data, f, indent=4)
+    write_json(temp_metadata_file, raw_data)
     
     # Generate metadata using LLM
     print(f"🧠 Generating track metadata with LLM...")
@@ -53,15 +53,13 @@ def process_single_release_email(msg, workflow):
             return
         
         # Load the newly generated metadata
-        with open(temp_metadata_file.replace('.json', '_generated.json'), 'r') as f:
-            new_track_data = json.load(f)
+        new_track_data = read_json(generated_file)
         
         # Add duration to tracks
         for track in new_track_data.get('tracks', []):
             audio_file = track.get('audio_file')
             if audio_file:
-                audio_path = audio_dir / audio_file
-                track['duration'] = get_duration(audio_path)
+                track['duration'] = get_duration(f"{audio_dir}/{audio_file}")
         
     except Exception as e:
         print(f"⚠️  Error generating LLM metadata: {e}")
@@ -71,8 +69,7 @@ def process_single_release_email(msg, workflow):
     
     # Load or create the main metadata file
     if metadata_file.exists():
-        with open(metadata_file, 'r') as f:
-            metadata = json.load(f)
+        metadata = read_json(metadata_file)
         print(f"📝 Appending to existing release with {len(metadata.get('tracks', []))} tracks")
     else:
         metadata = {
@@ -82,17 +79,17 @@ def process_single_release_email(msg, workflow):
         print(f"📝 Creating new release")
     
     # Append new tracks, updating track_num
-    for new_track in new_track_data.get('tracks', []):
-        new_track['track_num'] = len(metadata['tracks']) + 1
+    base = len(metadata['tracks'])
+    for track_num, new_track in enumerate(new_track_data.get('tracks', []), start=base + 1):
+        new_track['track_num'] = track_num
         metadata['tracks'].append(new_track)
         print(f"  ✓ Added track #{new_track['track_num']}: {new_track.get('title', 'Unknown')}")
     
     # Save updated metadata
-    with open(metadata_file, 'w') as f:
-        json.dump(metadata, f, indent=4)
+    atomic_write_json(metadata_file, metadata)
     
     # Clean up temp files
     temp_metadata_file.unlink(missing_ok=True)
-    Path(str(temp_metadata_file).replace('.json', '_generated.json')).unlink(missing_ok=True)
+    generated_file.unlink(missing_ok=True)
     
     print(f"✅ Release now has {len(metadata['tracks'])} total tracks")
@@ -4,28 +4,22 @@ Supabase Sync - Upload email archive data directly to Supabase
 Replaces the need for generate_manifests.py and generate_track_registry.py
 """
 
-import json
 import os
 import sys
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from hashlib import blake2b
 from pathlib import Path
-from typing import Dict, Optional
-from supabase import create_client, Client
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 sys.path.insert(0, str(Path(__file__).parent.resolve()))
 from workflows import WORKFLOWS
+from jsonio import loads, read_json
 
-# Load environment variables
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY in environment")
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+if TYPE_CHECKING:
+    from supabase import Client
 
 # Display metadata per collection (presentation data not stored in WorkflowConfig)
 COLLECTION_DISPLAY = {
@@ -73,14 +67,95 @@ COLLECTION_DISPLAY = {
     },
 }
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+@lru_cache(maxsize=1)
+def _client() -> "Client":
+    """
+    Create the Supabase client once per process.
+    supabase/dotenv are imported here so --help and importers that never
+    touch the database don't pay for loading them.
+    """
+    from supabase import create_client
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
+
+    if not supabase_url or not supabase_key:
+        raise ValueError("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY in environment")
+
+    client = create_client(supabase_url, supabase_key)
+    _use_http2(client)
+    return client
+
+
+def _use_http2(client) -> None:
+    """
+    Swap PostgREST's HTTP/1.1 session for a pooled HTTP/2 one so concurrent
+    syncs multiplex over a kept-alive connection. No-op unless h2 is installed.
+    """
+    try:
+        import h2  # noqa: F401 - httpx needs it for http2=True
+        import httpx
+    except ImportError:
+        return
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY in environment")
+    try:
+        postgrest = client.postgrest
+        old_session = postgrest.session
+        postgrest.session = httpx.Client(
+            base_url=old_session.base_url,
+            headers=old_session.headers,
+            timeout=old_session.timeout,
+            follow_redirects=old_session.follow_redirects,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+        )
+        old_session.close()
+    except AttributeError:
+        # Client internals differ across supabase-py versions - keep the default session
+        pass
+
+
+# PostgREST codes it serves as 503/504 (database unreachable, pool timeout,
+# schema cache not loaded yet)
+_TRANSIENT_PGRST_CODES = frozenset({'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003'})
+# Postgres SQLSTATE classes that are worth retrying: connection exception,
+# transaction rollback (serialization failure/deadlock), insufficient resources
+_TRANSIENT_SQLSTATE_CLASSES = ('08', '40', '53')
+
+
+def _is_transient(error: Exception) -> bool:
+    """True for network failures and server-side (5xx) errors - not for 4xx/bad requests"""
+    import httpx
+
+    if isinstance(error, httpx.TransportError):
+        return True
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # postgrest's APIError carries the HTTP status as code only when the body
+    # wasn't JSON; otherwise code is a PostgREST or SQLSTATE error code
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code >= 500
+    if isinstance(code, str):
+        if code.isdigit() and len(code) == 3:
+            return code.startswith('5')
+        if code in _TRANSIENT_PGRST_CODES:
+            return True
+        return len(code) == 5 and code.startswith(_TRANSIENT_SQLSTATE_CLASSES)
+    return False
+
+
+def _execute_with_retry(query, attempts: int = 3):
+    """Execute a Supabase query, retrying transient failures with jittered backoff"""
+    for attempt in range(attempts):
+        try:
+            return query.execute()
+        except Exception as e:
+            if attempt == attempts - 1 or not _is_transient(e):
+                raise
+            time.sleep(0.5 * 2 ** attempt + random.uniform(0, 0.5))
 
 
 def generate_track_id(audio_file: str, collection_id: str) -> str:
@@ -93,42 +168,37 @@ def generate_track_id(audio_file: str, collection_id: str) -> str:
     return f"{collection_id}_{track_name}"
 
 
-def sync_release_to_supabase(
+def _prepare_release(
     collection_id: str,
     release_dir: Path,
-    release_type: str = "Issue",
-    collection_type: str = "bound_volume"
-) -> bool:
+    release_type: str,
+    collection_type: str
+) -> Optional[Dict]:
     """
-    Sync a single release to Supabase.
-    Reads metadata.json and uploads release + tracks.
-    
-    Args:
-        collection_id: The collection this release belongs to
-        release_dir: Path to the release directory (e.g., Issue_23)
-        release_type: "Issue", "Volume", etc.
+    Upsert a release row and build its track rows, without writing the tracks.
     
     Returns:
-        True if successful, False otherwise
+        {'release_id', 'digest', 'unchanged', 'tracks'} where tracks maps
+        track ID -> row, or None if the release couldn't be synced
     """
     metadata_file = release_dir / "metadata.json"
     raw_file = release_dir / "raw.json"
     
     if not metadata_file.exists():
         print(f"  ⚠️  No metadata.json in {release_dir.name}")
-        return False
+        return None
     
     try:
-        # Load metadata
-        with open(metadata_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        supabase = _client()
+        
+        # Load metadata (hash the raw bytes so unchanged releases can skip track upserts)
+        metadata_bytes = metadata_file.read_bytes()
+        metadata = loads(metadata_bytes)
+        digest = blake2b(metadata_bytes, digest_size=8).hexdigest()
         
         # Load raw.json for release date
-        release_date = None
-        if raw_file.exists():
-            with open(raw_file, 'r', encoding='utf-8') as f:
-                raw_data = json.load(f)
-                release_date = raw_data.get('date')
+        raw_data = read_json(raw_file) if raw_file.exists() else {}
+        release_date = raw_data.get('date')
         
         release_num = metadata.get('issue_number') or metadata.get('release_number')
 
@@ -146,9 +216,7 @@ def sync_release_to_supabase(
             # Read human-readable title from raw.json
             release_title = None
             if raw_file.exists():
-                with open(raw_file, 'r', encoding='utf-8') as f:
-                    raw_data_for_title = json.load(f)
-                    release_title = raw_data_for_title.get('release_title') or release_dir.name
+                release_title = raw_data.get('release_title') or release_dir.name
         release_image = metadata.get('issue_image') or metadata.get('release_image')
         
         # Build release image path
@@ -173,31 +241,37 @@ def sync_release_to_supabase(
         if collection_type == "named_release":
             db_release['release_title'] = release_title
         
-        result = supabase.table('releases').upsert(
+        result = _execute_with_retry(supabase.table('releases').upsert(
             db_release,
             on_conflict='collection_id,release_number'
-        ).execute()
+        ))
         
         if not result.data:
             print(f"  ⚠️  Failed to upsert release {release_num}")
-            return False
+            return None
         
         release_id = result.data[0]['id']
         print(f"  ✓ Release {release_num} synced (ID: {release_id})")
         
-        # Upsert tracks
+        # Track rows keyed by ID so duplicates collapse the same way
+        # sequential upserts would - last one wins
+        base = f"archives/{collection_id}/{release_dir.name}"
+        audio_base = f"{base}/audio"
+        img_base = f"{base}/images"
+        first_appearance = f"{release_type} {release_num}"
+        db_tracks = {}
         for track_data in tracks_data:
             audio_file = track_data.get('audio_file')
             if not audio_file:
                 continue
             
             track_id = generate_track_id(audio_file, collection_id)
-            audio_path = f"archives/{collection_id}/{release_dir.name}/audio/{audio_file}"
+            audio_path = f"{audio_base}/{audio_file}"
             
             track_image = track_data.get('track_image')
             track_image_path = None
             if track_image:
-                track_image_path = f"archives/{collection_id}/{release_dir.name}/images/{track_image}"
+                track_image_path = f"{img_base}/{track_image}"
             
             db_track = {
                 'id': track_id,
@@ -210,24 +284,147 @@ def sync_release_to_supabase(
                 'duration': track_data.get('duration', 0),
                 'collection_id': collection_id,
                 'release_id': release_id,
-                'first_appearance': f"{release_type} {release_num}",
+                'first_appearance': first_appearance,
                 'track_order': track_data.get('track_num')
             }
             
-            supabase.table('tracks').upsert(db_track).execute()
+            db_tracks[track_id] = db_track
         
-        print(f"  ✓ {len(tracks_data)} tracks synced")
-        return True
+        return {
+            'release_id': release_id,
+            'digest': digest,
+            'unchanged': result.data[0].get('metadata_hash') == digest,
+            'tracks': db_tracks,
+        }
         
+    except Exception as e:
+        print(f"  ❌ Error syncing release: {e}")
+        return None
+
+
+def _upsert_tracks(db_tracks: Dict[str, Dict]) -> None:
+    """Upsert track rows in one request"""
+    if db_tracks:
+        _execute_with_retry(_client().table('tracks').upsert(list(db_tracks.values()), on_conflict='id'))
+
+
+# Set once releases.metadata_hash turns out not to exist (add_metadata_hash.sql not run yet)
+_metadata_hash_unavailable = False
+
+
+def _is_missing_column(error: Exception) -> bool:
+    """True if PostgREST/Postgres rejected a write because a column doesn't exist"""
+    # PGRST204: column not in PostgREST's schema cache; 42703: undefined_column
+    return getattr(error, 'code', None) in ('PGRST204', '42703')
+
+
+def _record_metadata_hash(release_id, digest: str) -> None:
+    """
+    Store a release's metadata hash - only once its tracks are in, so a failed run retries next time.
+    Without the metadata_hash column this warns once and syncs everything every run.
+    """
+    global _metadata_hash_unavailable
+    if _metadata_hash_unavailable:
+        return
+    try:
+        _execute_with_retry(_client().table('releases').update({'metadata_hash': digest}).eq('id', release_id))
+    except Exception as e:
+        if not _is_missing_column(e):
+            raise
+        if not _metadata_hash_unavailable:
+            _metadata_hash_unavailable = True
+            print("  ⚠️  releases.metadata_hash is missing - run add_metadata_hash.sql to skip unchanged releases")
+
+
+def sync_release_to_supabase(
+    collection_id: str,
+    release_dir: Path,
+    release_type: str = "Issue",
+    collection_type: str = "bound_volume"
+) -> bool:
+    """
+    Sync a single release to Supabase.
+    Reads metadata.json and uploads release + tracks.
+    
+    Args:
+        collection_id: The collection this release belongs to
+        release_dir: Path to the release directory (e.g., Issue_23)
+        release_type: "Issue", "Volume", etc.
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    prepared = _prepare_release(collection_id, release_dir, release_type, collection_type)
+    if prepared is None:
+        return False
+    
+    if prepared['unchanged']:
+        print(f"  ✓ Tracks unchanged, skipping")
+        return True
+    
+    try:
+        _upsert_tracks(prepared['tracks'])
+        _record_metadata_hash(prepared['release_id'], prepared['digest'])
     except Exception as e:
         print(f"  ❌ Error syncing release: {e}")
         return False
+    
+    print(f"  ✓ {len(prepared['tracks'])} tracks synced")
+    return True
 
 
+def sync_releases_concurrently(
+    collection_id: str,
+    release_dirs: List[Path],
+    release_type: str,
+    collection_type: str,
+    max_workers: int = 8
+) -> bool:
+    """
+    Sync several releases, overlapping the per-release round trips.
+    
+    Track IDs are collection-wide, so one track can appear in several releases.
+    Rows are merged in release_dirs order (last one wins, as a sequential sync
+    would) and upserted once, so which release owns a shared track never
+    depends on thread timing.
+    
+    Returns:
+        True if every release synced, False otherwise
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        prepared = list(ex.map(
+            lambda d: _prepare_release(collection_id, d, release_type, collection_type),
+            release_dirs
+        ))
+        
+        # Unchanged releases still take part in the merge so they keep the
+        # tracks they own; only IDs touched by a changed release are written
+        merged = {}
+        changed_ids = set()
+        changed = []
+        for p in prepared:
+            if p is None:
+                continue
+            merged.update(p['tracks'])
+            if not p['unchanged']:
+                changed_ids.update(p['tracks'])
+                changed.append(p)
+        
+        try:
+            _upsert_tracks({tid: merged[tid] for tid in changed_ids})
+            list(ex.map(lambda p: _record_metadata_hash(p['release_id'], p['digest']), changed))
+        except Exception as e:
+            print(f"  ❌ Error syncing tracks: {e}")
+            return False
+    
+    print(f"  ✓ {len(changed_ids)} tracks synced from {len(changed)} changed releases")
+    return None not in prepared
+
 
 def ensure_collection_exists(collection_id: str, collection_config: Dict) -> bool:
     """Ensure a collection exists in Supabase."""
     try:
+        supabase = _client()
         workflow = WORKFLOWS[collection_id]
         display = COLLECTION_DISPLAY[collection_id]
 
@@ -281,6 +478,9 @@ if __name__ == "__main__":
 
     workflow = WORKFLOWS[args.collection_id]
 
+    # Fail fast on missing credentials before any per-release work
+    _client()
+
     if workflow.collection_type == "bound_volume":
         release_type = workflow.release_indicator
         release_pattern = f"{release_type}_"
@@ -301,6 +501,7 @@ if __name__ == "__main__":
     if args.replace:
         print(f"🗑️  Replacing existing data for '{args.collection_id}'...")
         try:
+            supabase = _client()
             # Delete tracks for this collection
             supabase.table('tracks').delete().eq('collection_id', args.collection_id).execute()
             # Delete releases for this collection
@@ -324,19 +525,24 @@ if __name__ == "__main__":
         sync_release_to_supabase(args.collection_id, release_dir, release_type, workflow.collection_type)
 
     elif args.all:
-        if workflow.collection_type == "named_release":
-            release_folders = sorted([f for f in base_path.iterdir() if f.is_dir()])
-        elif release_pattern:
-            release_folders = sorted([
-                f for f in base_path.iterdir()
-                if f.is_dir() and f.name.startswith(release_pattern)
-            ])
+        if workflow.collection_type == "named_release" or release_pattern:
+            # One scandir pass; DirEntry.is_dir() is served from readdir without a stat
+            with os.scandir(base_path) as entries:
+                release_folders = sorted(
+                    Path(e.path) for e in entries
+                    if e.is_dir() and (release_pattern is None or e.name.startswith(release_pattern))
+                )
         else:
             release_folders = []
 
         print(f"📤 Syncing {len(release_folders)} releases to Supabase...")
-        for release_dir in release_folders:
-            sync_release_to_supabase(args.collection_id, release_dir, release_type, workflow.collection_type)
+        if workflow.collection_type == "named_release":
+            # Release numbers are assigned from the current max - must stay sequential
+            for release_dir in release_folders:
+                sync_release_to_supabase(args.collection_id, release_dir, release_type, workflow.collection_type)
+        else:
+            # Release upserts are independent and latency-bound - overlap the round trips
+            sync_releases_concurrently(args.collection_id, release_folders, release_type, workflow.collection_type)
         print(f"\n✅ Sync complete!")
 
     else:
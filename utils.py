@@ -1,14 +1,34 @@
 import re
 import os
-import json
 import time
-import tempfile
+import errno
+import shutil
 
 from ffmpeg_normalize import FFmpegNormalize, MediaFile
 
+from jsonio import read_json
+
+_SLUG_NONALNUM = re.compile(r'[^a-z0-9]+')
+_SLUG_COLLAPSE = re.compile(r'_+')
+_RELEASE_NUM = re.compile(r'(?:Issue|#|Volume)\s*(\d+)', re.IGNORECASE)
+_ANY_NUM = re.compile(r'(\d+)')
+
+# Map extensions to valid codecs
+# .m4a needs aac, .mp3 needs libmp3lame
+_CODEC_MAP = {
+    '.m4a': 'aac',
+    '.mp3': 'libmp3lame',
+    '.wav': 'pcm_s16le'
+}
+
+# Single-pass character maps for clean_text / sanitize_for_json
+_CLEAN_TABLE = str.maketrans({'\r': None, '\n': ' '})
+_SANITIZE_TABLE = str.maketrans({'\\': '/', '"': "'"})
+
+
 def clean_text(text):
     if not text: return ""
-    return text.replace('\r', '').replace('\n', ' ').strip()
+    return text.translate(_CLEAN_TABLE).strip()
 
 
 def sanitize_for_json(text):
@@ -16,21 +36,64 @@ def sanitize_for_json(text):
     if not text: return ""
     # Replace backslashes with forward slashes and convert double quotes to single
     # This prevents the AI from generating unescaped control characters in JSON strings
-    return text.replace('\\', '/').replace('"', "'")
+    return text.translate(_SANITIZE_TABLE)
 
 def slugify_filename(filename):
     name, ext = os.path.splitext(filename)
     name = name.lower()
-    name = re.sub(r'[^a-z0-9]+', '_', name)
-    name = re.sub(r'_+', '_', name).strip('_')
+    name = _SLUG_NONALNUM.sub('_', name)
+    name = _SLUG_COLLAPSE.sub('_', name).strip('_')
     return f"{name}{ext.lower()}"
 
 
 
+def move_file(src, dst):
+    """Move a file with a single rename, falling back to shutil.move across filesystems"""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
+def _find_release_number(subject):
+    """
+    String-method equivalent of _RELEASE_NUM.search for ASCII subjects:
+    the digits after the leftmost keyword that is followed by a number.
+    Returns None if there is no such keyword.
+    """
+    s = subject.lower()
+    n = len(s)
+    best_pos, best = n, None
+    for kw in ('issue', '#', 'volume'):
+        i = s.find(kw)
+        while i != -1 and i < best_pos:
+            j = i + len(kw)
+            while j < n and s[j].isspace():
+                j += 1
+            k = j
+            while k < n and s[k].isdecimal():
+                k += 1
+            if k > j:
+                best_pos, best = i, s[j:k]
+                break
+            i = s.find(kw, i + 1)
+    return best
+
+
 def get_release_number_fallback(subject):
-    match = re.search(r'(?:Issue|#|Volume)\s*(\d+)', subject, re.IGNORECASE)
+    # Fast path avoids the regex engine; non-ASCII case folding is left to re
+    if subject.isascii():
+        number = _find_release_number(subject)
+        if number is not None:
+            return number
+        match = _ANY_NUM.search(subject)
+        return match.group(1) if match else "unknown"
+    
+    match = _RELEASE_NUM.search(subject)
     if not match:
-        match = re.search(r'(\d+)', subject)
+        match = _ANY_NUM.search(subject)
     return match.group(1) if match else "unknown"
 
 
@@ -48,59 +111,52 @@ def normalize_audio(input_path):
     # 1. Determine extension and appropriate codec
     file_ext = os.path.splitext(input_path)[1].lower()
     
-    # Map extensions to valid codecs
-    # .m4a needs aac, .mp3 needs libmp3lame
-    codec_map = {
-        '.m4a': 'aac',
-        '.mp3': 'libmp3lame',
-        '.wav': 'pcm_s16le'
-    }
-    target_codec = codec_map.get(file_ext, 'libmp3lame')
+    target_codec = _CODEC_MAP.get(file_ext, 'libmp3lame')
     
-    # 2. Use a temporary directory for the output to prevent destructive loss
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        temp_output = os.path.join(tmp_dir, f"norm_{os.path.basename(input_path)}")
-
-        # Configure the normalizer
-        norm = FFmpegNormalize(
-            normalization_type='ebu',
-            target_level=-16,
-            audio_codec=target_codec,
-            extra_output_options=['-b:a', '320k'] if target_codec != 'aac' else ['-b:a', '192k'],
-            print_stats=False,
-            overwrite=True
-        )
+    # 2. Write to a hidden temp file beside the source so the swap is a same-filesystem rename
+    temp_output = os.path.join(os.path.dirname(input_path), f".norm_{os.path.basename(input_path)}")
+
+    # Configure the normalizer
+    norm = FFmpegNormalize(
+        normalization_type='ebu',
+        target_level=-16,
+        audio_codec=target_codec,
+        extra_output_options=['-b:a', '320k'] if target_codec != 'aac' else ['-b:a', '192k'],
+        print_stats=False,
+        overwrite=True
+    )
+    
+    try:
+        # Create MediaFile and run
+        media_file = MediaFile(norm, input_path, temp_output)
+        norm.media_files.append(media_file)
+        norm.run_normalization()
         
-        try:
-            # Create MediaFile and run
-            media_file = MediaFile(norm, input_path, temp_output)
-            norm.media_files.append(media_file)
-            norm.run_normalization()
-            
-            # 3. VERIFICATION: Ensure output exists and is not an empty file
-            if os.path.exists(temp_output) and os.path.getsize(temp_output) > 0:
-                # 4. SWAP: Only now do we overwrite the original source
-                # Using shutil.move across potential file system boundaries
-                shutil.move(temp_output, input_path)
-                print(f"✅ Success: {os.path.basename(input_path)}")
-                return True
-            else:
-                print(f"⚠️ Verification failed: Output for {input_path} was empty.")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Normalization failed for {os.path.basename(input_path)}")
-            print(f"   Reason: {e}")
-            # Source file is safe because we only worked on the temp copy
+        # 3. VERIFICATION: Ensure output exists and is not an empty file
+        if os.path.exists(temp_output) and os.path.getsize(temp_output) > 0:
+            # 4. SWAP: Only now do we overwrite the original source (atomic rename)
+            os.replace(temp_output, input_path)
+            print(f"✅ Success: {os.path.basename(input_path)}")
+            return True
+        else:
+            print(f"⚠️ Verification failed: Output for {input_path} was empty.")
             return False
+            
+    except Exception as e:
+        print(f"❌ Normalization failed for {os.path.basename(input_path)}")
+        print(f"   Reason: {e}")
+        # Source file is safe because we only worked on the temp copy
+        return False
+    finally:
+        # Left behind only if normalization or verification failed
+        if os.path.exists(temp_output):
+            os.remove(temp_output)
 
 
-def prepare_and_prompt(subject,attachments,body):
-    print("🧠 Gemini is analyzing...")
-    prompt = f"""
+_PROMPT_TEMPLATE = """
     Extract the 'Sonic Twist' newsletter into a JSON object.
     SUBJECT: {subject}
-    ATTACHMENTS AVAILABLE: {attchments}
+    ATTACHMENTS AVAILABLE: {attachments}
     BODY: {body}
 
     SCHEMA: 
@@ -119,6 +175,15 @@ def prepare_and_prompt(subject,attachments,body):
     ] 
     }}
     """
+
+
+def prepare_and_prompt(subject,attachments,body):
+    print("🧠 Gemini is analyzing...")
+    prompt = _PROMPT_TEMPLATE.format(
+        subject=sanitize_for_json(subject),
+        attachments=attachments,
+        body=sanitize_for_json(body)
+    )
     
     # Call Gemini with the new retry logic
     structured_data = ask_gemini_with_retry(prompt)
@@ -126,36 +191,65 @@ def prepare_and_prompt(subject,attachments,body):
     return structured_data
 
 
-def is_already_downloaded(uid, registry_path="downloaded_uids.json"):
-    if not os.path.exists(registry_path):
-        return False
-    with open(registry_path, "r") as f:
-        processed_uids = json.load(f)
-    return str(uid) in processed_uids
+# Processed UIDs per registry path, loaded once and kept in step with the file
+_registry_cache = {}
 
-def mark_as_downloaded(uid, registry_path="downloaded_uids.json"):
-    processed_uids = []
+
+def _write_registry(registry_path, uids):
+    """Rewrite a UID registry via a temp file + rename, so a crash can't leave it torn"""
+    tmp_path = f"{registry_path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.writelines(f"{uid}\n" for uid in uids)
+    os.replace(tmp_path, registry_path)
+
+
+def _load_registry(registry_path):
+    """
+    Load a UID registry (one UID per line) into a cached set.
+    If it doesn't exist yet, UIDs from the old JSON-list registry beside it
+    (same name, .json) are carried over.
+    """
+    uids = _registry_cache.get(registry_path)
+    if uids is not None:
+        return uids
+    
+    uids = set()
     if os.path.exists(registry_path):
         with open(registry_path, "r") as f:
-            processed_uids = json.load(f)
+            uids = {line.strip() for line in f if line.strip()}
+    else:
+        legacy_path = os.path.splitext(registry_path)[0] + ".json"
+        if legacy_path != registry_path and os.path.exists(legacy_path):
+            legacy_uids = [str(uid) for uid in read_json(legacy_path)]
+            _write_registry(registry_path, dict.fromkeys(legacy_uids))
+            uids = set(legacy_uids)
     
-    if str(uid) not in processed_uids:
-        processed_uids.append(str(uid))
-        with open(registry_path, "w") as f:
-            json.dump(processed_uids, f)
+    _registry_cache[registry_path] = uids
+    return uids
+
 
-def remove_from_downloaded(uid, registry_path="downloaded_uids.json"):
+def is_already_downloaded(uid, registry_path="downloaded_uids.txt"):
+    return str(uid) in _load_registry(registry_path)
+
+def mark_as_downloaded(uid, registry_path="downloaded_uids.txt"):
+    uids = _load_registry(registry_path)
+    uid_str = str(uid)
+    if uid_str not in uids:
+        # Append-only: one short write per UID instead of rewriting the whole registry
+        with open(registry_path, "a") as f:
+            f.write(f"{uid_str}\n")
+        uids.add(uid_str)
+
+def remove_from_downloaded(uid, registry_path="downloaded_uids.txt"):
     """Remove a UID from the processed registry"""
-    if not os.path.exists(registry_path):
-        return False
-    
-    with open(registry_path, "r") as f:
-        processed_uids = json.load(f)
+    # Loading first also imports a legacy .json registry, so its UIDs can be removed
+    uids = _load_registry(registry_path)
     
     uid_str = str(uid)
-    if uid_str in processed_uids:
-        processed_uids.remove(uid_str)
-        with open(registry_path, "w") as f:
-            json.dump(processed_uids, f)
+    if uid_str in uids:
+        uids.discard(uid_str)
+        with open(registry_path, "r") as f:
+            remaining = [line.strip() for line in f]
+        _write_registry(registry_path, (u for u in remaining if u and u != uid_str))
         return True
-    return False
\ No newline at end of file
+    return False
@@ -7,98 +7,97 @@ using their UIDs from raw.json
 """
 
 import os
-import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 
+from jsonio import read_json
 
-def find_archive_directories(base_path: str = None) -> List[Path]:
-    """Find all archive directories (ending in _archives)"""
-    if base_path:
-        current_dir = Path(base_path)
-    else:
-        current_dir = Path(__file__).parent
-    
-    archives = [
-        d for d in current_dir.iterdir() 
-        if d.is_dir() and d.name.endswith('_archives')
-    ]
-    return sorted(archives)
 
-
-def find_release_folders(archive_dir: Path) -> List[Path]:
-    """Find all Issue_* or Volume_* folders within an archive"""
-    releases = [
-        d for d in archive_dir.iterdir()
-        if d.is_dir() and (d.name.startswith('Issue_') or d.name.startswith('Volume_'))
-    ]
-    return sorted(releases)
+def walk_archives(base_path: str = None) -> Iterator[Tuple[Path, List[Path]]]:
+    """
+    Walk base_path once, yielding each *_archives directory (sorted) with its
+    sorted Issue_*/Volume_* release folders. Nothing below a release is visited.
+    """
+    top = base_path or os.path.dirname(os.path.abspath(__file__))
+    
+    # followlinks keeps symlinked archives/releases visible; pruning bounds the depth
+    for dirpath, dirs, _ in os.walk(top, followlinks=True):
+        if dirpath == top:
+            dirs[:] = sorted(d for d in dirs if d.endswith('_archives'))
+            continue
+        
+        releases = sorted(d for d in dirs if d.startswith(('Issue_', 'Volume_')))
+        dirs.clear()
+        yield Path(dirpath), [Path(dirpath, d) for d in releases]
 
 
-def get_email_uids(release_dir: Path) -> Optional[List[str]]:
-    """Extract email UID(s) from raw.json"""
+def _read_raw_json(release_dir: Path) -> Optional[Dict]:
+    """Parse a release's raw.json, or None if it's missing or unreadable"""
     raw_json_path = release_dir / 'raw.json'
     
     if not raw_json_path.exists():
         return None
     
     try:
-        with open(raw_json_path, 'r') as f:
-            data = json.load(f)
-        
-        # UID can be a single value or a list
-        uid = data.get('uid')
-        if uid is None:
-            return None
-        
-        # Normalize to list
-        if isinstance(uid, list):
-            return [str(u) for u in uid]
-        else:
-            return [str(uid)]
+        return read_json(raw_json_path)
     except Exception as e:
         print(f"⚠️  Error reading raw.json: {e}")
         return None
 
-def get_email_message_ids(release_dir: Path) -> Optional[List[str]]:
-    """Extract email message-id from raw.sjon"""
-    raw_json_path = release_dir / 'raw.json'
 
-    if not raw_json_path.exists():
+def get_email_uids(release: Union[Path, Dict]) -> Optional[List[str]]:
+    """Extract email UID(s) from raw.json (a release directory or its parsed contents)"""
+    data = _read_raw_json(release) if isinstance(release, Path) else release
+    if data is None:
         return None
     
-    try:
-        with open(raw_json_path, 'r') as f:
-            data = json.load(f)
-
-        message_id = data.get('message_id')
-        if message_id is None:
-            return None
-        
-        if isinstance(message_id, list):
-            return [str(u) for u in message_id]
-        else:
-            return [str(message_id)]
-        
+    # UID can be a single value or a list
+    uid = data.get('uid')
+    if uid is None:
+        return None
+    
+    # Normalize to list
+    if isinstance(uid, list):
+        return [str(u) for u in uid]
+    else:
+        return [str(uid)]
 
-    except Exception as e:
-        print(f"⚠️  Error reading raw.json: {e}")
+def get_email_message_ids(release: Union[Path, Dict]) -> Optional[List[str]]:
+    """Extract email message-id from raw.json (a release directory or its parsed contents)"""
+    data = _read_raw_json(release) if isinstance(release, Path) else release
+    if data is None:
         return None
+    
+    message_id = data.get('message_id')
+    if message_id is None:
+        return None
+    
+    if isinstance(message_id, list):
+        return [str(u) for u in message_id]
+    else:
+        return [str(message_id)]
 
 
 def check_release_audio(release_dir: Path) -> Dict:
     """
     Check a single release directory for missing audio files.
-    """    
+    Paths stay plain strings - no Path objects are built here.
+    """
+    release_str = str(release_dir)
+    metadata_path = os.path.join(release_str, 'metadata.json')
+    raw_json_path = os.path.join(release_str, 'raw.json')
+    audio_dir = os.path.join(release_str, 'audio')
+    
     result = {
-        'release_name': release_dir.name,
-        'release_dir': str(release_dir),
-        'metadata_file': str(release_dir / 'metadata.json'),
-        'raw_json': str(release_dir / 'raw.json'),
+        'release_name': os.path.basename(release_str),
+        'release_dir': release_str,
+        'metadata_file': metadata_path,
+        'raw_json': raw_json_path,
         'has_metadata': False,
         'has_raw_json': False,
-        'audio_dir': str(release_dir / 'audio'),
+        'audio_dir': audio_dir,
         'has_audio_dir': False,
         'tracks': [],
         'missing_count': 0,
@@ -108,57 +107,56 @@ def check_release_audio(release_dir: Path) -> Dict:
         'message-id': None,
     }
     
-    metadata_path = release_dir / 'metadata.json'
-    raw_json_path = release_dir / 'raw.json'
-    audio_dir = release_dir / 'audio'
-    
-    # Check if raw.json exists and get UIDs
-    if raw_json_path.exists():
+    # Check if raw.json exists and get UIDs (parsed once for both lookups)
+    if os.path.exists(raw_json_path):
         result['has_raw_json'] = True
-        result['uids'] = get_email_uids(release_dir)
-        result['message_ids'] = get_email_message_ids(release_dir)
+        raw = _read_raw_json(Path(release_str))
+        result['uids'] = get_email_uids(raw)
+        result['message_ids'] = get_email_message_ids(raw)
     
     # Check if metadata exists
-    if not metadata_path.exists():
+    if not os.path.exists(metadata_path):
         return result
     
     result['has_metadata'] = True
     
+    metadata = read_json(metadata_path)
+    
+    tracks = metadata.get('tracks', [])
+    result['total_tracks'] = len(tracks)
+    
     # Check if audio directory exists
-    if not audio_dir.exists():
+    if not os.path.exists(audio_dir):
         result['has_audio_dir'] = False
-        with open(metadata_path, 'r') as f:
-            metadata = json.load(f)
-            tracks = metadata.get('tracks', [])
-            result['total_tracks'] = len(tracks)
-            result['missing_count'] = len(tracks)
+        result['missing_count'] = len(tracks)
         return result
     
     result['has_audio_dir'] = True
     
-    # Load metadata and check each track
-    with open(metadata_path, 'r') as f:
-        metadata = json.load(f)
+    # One directory read instead of a stat() per track (and per variant)
+    with os.scandir(audio_dir) as it:
+        existing = {e.name for e in it}
     
-    tracks = metadata.get('tracks', [])
-    result['total_tracks'] = len(tracks)
+    # Names to try per audio file: the file itself, then the .m4a variant of an .mp3
+    variants = {}
+    for track in tracks:
+        audio_file = track.get('audio_file')
+        if audio_file and audio_file not in variants:
+            if audio_file.endswith('.mp3'):
+                variants[audio_file] = (audio_file, audio_file[:-4] + '.m4a')
+            else:
+                variants[audio_file] = (audio_file,)
     
     for track in tracks:
         audio_file = track.get('audio_file')
         if not audio_file:
             continue
-            
-        # Check if file exists
-        audio_path = audio_dir / audio_file
-        exists = audio_path.exists()
         
-        # Try .m4a variant
-        if not exists and audio_file.endswith('.mp3'):
-            m4a_name = audio_file.replace('.mp3', '.m4a')
-            alt_path = audio_dir / m4a_name
-            if alt_path.exists():
-                exists = True
-                audio_file = m4a_name
+        # First candidate present on disk, if any
+        hit = next((name for name in variants[audio_file] if name in existing), None)
+        exists = hit is not None
+        if exists:
+            audio_file = hit
         
         track_info = {
             'track_num': track.get('track_num'),
@@ -182,38 +180,36 @@ def check_release_audio(release_dir: Path) -> Dict:
 def scan_archives_interactive(base_path: str = None, auto_fix: bool = False):
     """Scan archives and prompt to fix issues"""
     
-    archives = find_archive_directories(base_path)
-    
-    if not archives:
-        print("❌ No archive directories found!")
-        print(f"   Looking in: {base_path or Path(__file__).parent}")
-        return
-    
-    print(f"\n🔍 Found {len(archives)} archive directories\n")
+    print(f"\n🔍 Scanning archives in: {base_path or Path(__file__).parent}\n")
     
+    archive_count = 0
     issues_found = []
     
-    for archive in archives:
-        print(f"📂 Scanning: {archive.name}")
-        releases = find_release_folders(archive)
-        print(f"   Found {len(releases)} releases")
-        
-        for release_dir in releases:
-            result = check_release_audio(release_dir)
+    # Release checks are independent and I/O-bound - overlap them, print in order
+    with ThreadPoolExecutor(max_workers=min(32, 4 * (os.cpu_count() or 1))) as ex:
+        for archive, releases in walk_archives(base_path):
+            archive_count += 1
+            print(f"📂 Scanning: {archive.name}")
+            print(f"   Found {len(releases)} releases")
             
-            # Print status
-            if result['has_metadata']:
-                issues = []
-                if result['missing_count'] > 0:
-                    issues.append(f"{result['missing_count']}/{result['total_tracks']} files missing")
-                if result['missing_duration_count'] > 0:
-                    issues.append(f"{result['missing_duration_count']}/{result['total_tracks']} durations missing")
+            for result in ex.map(check_release_audio, releases):
+                # Print status
+                if result['has_metadata']:
+                    issues = []
+                    if result['missing_count'] > 0:
+                        issues.append(f"{result['missing_count']}/{result['total_tracks']} files missing")
+                    if result['missing_duration_count'] > 0:
+                        issues.append(f"{result['missing_duration_count']}/{result['total_tracks']} durations missing")
                 
-                if issues:
-                    print(f"   ⚠️  {result['release_name']}: {', '.join(issues)}")
-                    issues_found.append((archive.name, result))
-                else:
-                    print(f"   ✅ {result['release_name']}: All files present with durations")
+                    if issues:
+                        print(f"   ⚠️  {result['release_name']}: {', '.join(issues)}")
+                        issues_found.append((archive.name, result))
+                    else:
+                        print(f"   ✅ {result['release_name']}: All files present with durations")
+    
+    if not archive_count:
+        print("❌ No archive directories found!")
+        return
     
     # Summary
     print(f"\n{'='*80}")
@@ -277,14 +273,8 @@ def scan_archives_interactive(base_path: str = None, auto_fix: bool = False):
 def reprocess_release(archive_name: str, result: Dict):
     """Reprocess a release using the email processor"""
     
-    # Determine which workflow to use based on archive name
-    workflow_map = {
-        'sonic_twist_archives': 'sonic_twist',
-        'off_the_grid_archives': 'off_the_grid',
-        'even_more_cake_archives': 'even_more_cake',
-    }
-    
-    workflow_name = workflow_map.get(archive_name)
+    # Archive directories are named <workflow>_archives
+    workflow_name = archive_name[:-len('_archives')] if archive_name.endswith('_archives') else None
     
     if not workflow_name:
         print(f"   ❌ Unknown archive type: {archive_name}")
@@ -296,7 +286,13 @@ def reprocess_release(archive_name: str, result: Dict):
         from email_processor import EmailProcessor
         from imap_utils import fetch_emails
         
-        workflow = get_workflow(workflow_name)
+        # get_workflow rejects names that aren't configured workflows
+        try:
+            workflow = get_workflow(workflow_name)
+        except ValueError:
+            print(f"   ❌ Unknown archive type: {archive_name}")
+            return
+        
         processor = EmailProcessor(workflow)
         
         # Fetch and reprocess each UID
@@ -11,6 +11,7 @@ Each workflow defines:
 
 from dataclasses import dataclass, field
 from typing import List, Dict, Callable, Optional, Literal
+import fnmatch
 import re
 
 
@@ -21,6 +22,36 @@ class AttachmentProcessor:
     file_patterns: List[str]  # e.g., ["*.mp3", "*.m4a"]
     handler: str  # Reference to handler function name
     options: Dict = field(default_factory=dict)
+    
+    def __post_init__(self):
+        # Compile all glob patterns once into a single case-insensitive regex
+        translated = [f'(?:{fnmatch.translate(p.lower())})' for p in self.file_patterns]
+        self._pattern_re = re.compile('|'.join(translated) or r'(?!)')
+    
+    def matches(self, filename: str) -> bool:
+        """Check if filename matches any of this processor's patterns"""
+        return self._pattern_re.match(filename.lower()) is not None
+
+
+def _build_ext_map(processors: List[AttachmentProcessor]) -> Dict[str, AttachmentProcessor]:
+    """
+    Map extensions from plain "*.ext" patterns to their processor.
+    An extension is only mapped while no earlier processor has a more complex
+    glob, since that glob could also match it and would win on first-match order.
+    """
+    ext_map = {}
+    for processor in processors:
+        has_complex = False
+        for pattern in processor.file_patterns:
+            pattern = pattern.lower()
+            ext = pattern[1:]
+            if pattern.startswith('*.') and len(ext) > 1 and not any(c in ext[1:] for c in '*?[.'):
+                ext_map.setdefault(ext, processor)
+            else:
+                has_complex = True
+        if has_complex:
+            break
+    return ext_map
 
 
 @dataclass
@@ -65,15 +96,19 @@ class WorkflowConfig:
     generate_metadata: bool = True  # Generate metadata.json using LLM
     metadata_llm_provider: str = "gemini"  # "gemini", "openai", or "anthropic"
     metadata_schema: Optional[Dict] = None  # Custom schema (uses default if None)
+    pretty_raw_json: bool = False  # Indent raw.json for reading by hand (compact otherwise)
     
     # Single Release Mode (for collections like Mixed Nuts)
     single_release_mode: bool = False  # All emails append to one growing release
     single_release_name: str = ""  # Name of the single release folder
     
     # Registry
-    registry_filename: str = "downloaded_uids.json"
+    registry_filename: str = "downloaded_uids.txt"  # One UID per line, append-only
     processed_filename: str = "processed.json"
     
+    # Attachment dispatcher, specialized on first use (see match_processor)
+    _dispatch: Optional[Callable] = field(default=None, init=False, repr=False, compare=False)
+    
     def get_folder_name(self, release_number: str) -> str:
         """Generate folder name for a given release number"""
         return self.folder_pattern.format(number=release_number)
@@ -85,6 +120,57 @@ class WorkflowConfig:
             match = re.search(self.release_number_fallback, subject)
         return match.group(1) if match else "unknown"
     
+    def match_processor(self, filename: str) -> Optional[AttachmentProcessor]:
+        """Return the first attachment processor whose patterns match filename"""
+        if self._dispatch is None:
+            self._dispatch = self._build_dispatch()
+        return self._dispatch(filename.lower())
+    
+    def _build_dispatch(self) -> Callable[[str], Optional[AttachmentProcessor]]:
+        """Build a dispatch function specialized for this workflow's processors"""
+        processors = list(self.attachment_processors)
+        table = [(p._pattern_re.match, p) for p in processors]
+        
+        def dispatch_table(name: str) -> Optional[AttachmentProcessor]:
+            for match, processor in table:
+                if match(name):
+                    return processor
+            return None
+        
+        fallback = dispatch_table
+        
+        if len(processors) > 4:
+            # Many processors: one combined regex, the named group says which matched.
+            # Alternation is tried left to right, so first-match order is preserved.
+            try:
+                combined = re.compile('|'.join(
+                    f'(?P<p{i}>{p._pattern_re.pattern})' for i, p in enumerate(processors)
+                ))
+            except re.error:
+                combined = None
+            
+            if combined is not None:
+                def dispatch_combined(name: str) -> Optional[AttachmentProcessor]:
+                    m = combined.match(name)
+                    return processors[int(m.lastgroup[1:])] if m else None
+                
+                fallback = dispatch_combined
+        
+        ext_map = _build_ext_map(processors)
+        if not ext_map:
+            return fallback
+        
+        # Common case: a plain "*.ext" pattern decides it with one dict lookup
+        def dispatch_ext(name: str) -> Optional[AttachmentProcessor]:
+            dot = name.rfind('.')
+            if dot != -1:
+                processor = ext_map.get(name[dot:])
+                if processor is not None:
+                    return processor
+            return fallback(name)
+        
+        return dispatch_ext
+    
     def to_imap_args(self) -> Dict:
         """Convert workflow config to IMAP fetch arguments"""
         args = {